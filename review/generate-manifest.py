@@ -6,19 +6,54 @@ Scans asset directories and generates a manifest.json for the QA Portal.
 Run this before each release to capture all reviewable assets.
 
 Usage:
-    python generate-manifest.py [--project PROJECT]
+    python generate-manifest.py [--project PROJECT] [--jobs N] [--threads] [--no-cache]
 
     --project: spellengine, hashchampions, or all (default: all)
+    --jobs: workers used for hashing (default: CPU count, or 4x that with --threads)
+    --threads: hash in worker threads instead of processes
+    --no-cache: re-hash files even if unchanged since the last manifest
 """
 
+import fnmatch
+import functools
+import io
 import json
+import mmap
 import os
+import re
 import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import argparse
 import yaml
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader  # libyaml not available
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Fall back to the stdlib json parser
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None  # Fall back to MD5
+
+# Hash used for change detection (not integrity), recorded in the manifest
+HASH_ALGORITHM = "blake3" if blake3 else "md5"
+
+# Files larger than this are memory-mapped for MD5 instead of read
+MMAP_THRESHOLD = 64 << 10
+
+# Images up to this size are read once and shared between hashing and PIL
+IMAGE_READ_LIMIT = 8 << 20
+
+IMAGE_SUFFIXES = ['.png', '.jpg', '.jpeg', '.gif']
+
 # Project configurations
 PROJECTS = {
     "spellengine": {
@@ -185,8 +220,11 @@ def extract_narrative_items(filepath: Path) -> list:
 
     try:
         if filepath.suffix == '.json':
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            if orjson is not None:
+                data = orjson.loads(filepath.read_bytes())
+            else:
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
 
             # Campaign.json - extract chapter intros, encounters, dialogue
             if 'chapters' in data:
@@ -199,20 +237,22 @@ def extract_narrative_items(filepath: Path) -> list:
                             "id": f"chapter_{chapter.get('number', 0)}_intro"
                         })
                     for encounter in chapter.get('encounters', []):
+                        encounter_title = encounter.get('title', 'Untitled')
+                        encounter_id = encounter.get('id', 'unknown')
                         if encounter.get('intro_text'):
                             items.append({
                                 "type": "encounter_intro",
                                 "text": encounter.get('intro_text', ''),
-                                "context": f"{chapter.get('title', '')} > {encounter.get('title', 'Untitled')}",
-                                "id": f"encounter_{encounter.get('id', 'unknown')}_intro"
+                                "context": f"{chapter.get('title', '')} > {encounter_title}",
+                                "id": f"encounter_{encounter_id}_intro"
                             })
                         # Extract hints
                         for i, hint in enumerate(encounter.get('hints', []), 1):
                             items.append({
                                 "type": "hint",
                                 "text": hint,
-                                "context": f"{encounter.get('title', 'Untitled')} - Hint {i}",
-                                "id": f"encounter_{encounter.get('id', 'unknown')}_hint_{i}",
+                                "context": f"{encounter_title} - Hint {i}",
+                                "id": f"encounter_{encounter_id}_hint_{i}",
                                 "hintLevel": i
                             })
 
@@ -275,33 +315,35 @@ def extract_narrative_items(filepath: Path) -> list:
 
         elif filepath.suffix in ['.yaml', '.yml']:
             with open(filepath, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+                data = yaml.load(f, Loader=YamlLoader)
 
             if data is None:
                 return items
 
             # Encounter YAML
             if 'intro_text' in data or 'title' in data:
+                title = data.get('title', filepath.stem)
+                encounter_id = data.get('id', filepath.stem)
                 if data.get('intro_text'):
                     items.append({
                         "type": "encounter_intro",
                         "text": data.get('intro_text', ''),
-                        "context": data.get('title', filepath.stem),
-                        "id": f"encounter_{data.get('id', filepath.stem)}_intro"
+                        "context": title,
+                        "id": f"encounter_{encounter_id}_intro"
                     })
                 if data.get('success_text'):
                     items.append({
                         "type": "encounter_success",
                         "text": data.get('success_text', ''),
-                        "context": f"{data.get('title', filepath.stem)} - Success",
-                        "id": f"encounter_{data.get('id', filepath.stem)}_success"
+                        "context": f"{title} - Success",
+                        "id": f"encounter_{encounter_id}_success"
                     })
                 if data.get('failure_text'):
                     items.append({
                         "type": "encounter_failure",
                         "text": data.get('failure_text', ''),
-                        "context": f"{data.get('title', filepath.stem)} - Failure",
-                        "id": f"encounter_{data.get('id', filepath.stem)}_failure"
+                        "context": f"{title} - Failure",
+                        "id": f"encounter_{encounter_id}_failure"
                     })
                 # Extract hints
                 for i, hint in enumerate(data.get('hints', []), 1):
@@ -309,8 +351,8 @@ def extract_narrative_items(filepath: Path) -> list:
                     items.append({
                         "type": "hint",
                         "text": hint_text,
-                        "context": f"{data.get('title', filepath.stem)} - Hint {i}",
-                        "id": f"encounter_{data.get('id', filepath.stem)}_hint_{i}",
+                        "context": f"{title} - Hint {i}",
+                        "id": f"encounter_{encounter_id}_hint_{i}",
                         "hintLevel": i
                     })
                 # Extract dialogue segments
@@ -319,8 +361,8 @@ def extract_narrative_items(filepath: Path) -> list:
                         items.append({
                             "type": "dialogue",
                             "text": dialogue.get('text', dialogue.get('line', '')),
-                            "context": f"{data.get('title', filepath.stem)} - {dialogue.get('speaker', 'Unknown')}",
-                            "id": f"dialogue_{data.get('id', filepath.stem)}_{dialogue.get('id', len(items))}",
+                            "context": f"{title} - {dialogue.get('speaker', 'Unknown')}",
+                            "id": f"dialogue_{encounter_id}_{dialogue.get('id', len(items))}",
                             "speaker": dialogue.get('speaker', dialogue.get('character', ''))
                         })
 
@@ -343,66 +385,259 @@ def extract_narrative_items(filepath: Path) -> list:
     return items
 
 
-def get_file_info(filepath: Path) -> dict:
-    """Get metadata for a file."""
-    stat = filepath.stat()
+def hash_file(filepath: Path, size: int) -> str:
+    """Return a short content hash of a file for change detection.
+
+    ``size`` is the file's size from stat; it picks between mmap and a
+    single raw read, and bounds how much is hashed.
+    """
+    if blake3 is not None:
+        hasher = blake3()
+        hasher.update_mmap(filepath)
+        return hasher.hexdigest(length=4)
+
+    # Large files are hashed straight from the page cache via mmap, with
+    # no copy into a Python buffer
+    if size > MMAP_THRESHOLD:
+        with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            return hashlib.md5(mm).hexdigest()[:8]
+
+    # Small files are read with a single raw read of the known size,
+    # skipping the file object's fstat and the extra read to find EOF
+    md5 = hashlib.md5()
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        while size > 0 and (chunk := os.read(fd, size)):
+            md5.update(chunk)
+            size -= len(chunk)
+    finally:
+        os.close(fd)
+    return md5.hexdigest()[:8]
+
 
-    # Calculate MD5 for change detection
-    with open(filepath, 'rb') as f:
-        md5 = hashlib.md5(f.read()).hexdigest()[:8]
+def hash_bytes(data: bytes) -> str:
+    """Return a short content hash of in-memory file contents."""
+    if blake3 is not None:
+        return blake3(data).hexdigest(length=4)
+    return hashlib.md5(data).hexdigest()[:8]
+
+
+@functools.cache
+def pil_image():
+    """Return PIL's Image module, or None if PIL isn't available (checked once)."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None  # PIL not available
+    return Image
+
+
+def image_dimensions(source) -> str:
+    """Return "WxH" for an image path or file object, or None if unreadable."""
+    Image = pil_image()
+    if Image is None:
+        return None
+    try:
+        with Image.open(source) as img:
+            return f"{img.width}x{img.height}"
+    except Exception:
+        pass  # Can't read image
+    return None
+
+
+def get_file_info(filepath: Path, cached: tuple = None) -> dict:
+    """Get metadata for a file.
+
+    ``cached`` is this file's (size, modified, hash, dimensions) entry from
+    the previous manifest; when size and mtime still match, the hash and
+    dimensions are reused instead of re-reading the file (image dimensions
+    that came out None are looked up again). A cached hash of None means
+    only the dimensions are still valid.
+    """
+    stat = filepath.stat()
+    modified = datetime.fromtimestamp(stat.st_mtime).isoformat()
+    unchanged = cached and cached[0] == stat.st_size and cached[1] == modified
+    is_image = filepath.suffix.lower() in IMAGE_SUFFIXES
+
+    if unchanged and cached[2] is not None:
+        dimensions = cached[3]
+        if is_image and dimensions is None and pil_image() is not None:
+            # No dimensions last time (e.g. PIL was missing); try again
+            dimensions = image_dimensions(filepath)
+        return {
+            "size": stat.st_size,
+            "modified": modified,
+            "hash": cached[2],
+            "dimensions": dimensions
+        }
 
     # Get dimensions for images
     dimensions = None
-    if filepath.suffix.lower() in ['.png', '.jpg', '.jpeg', '.gif']:
-        try:
-            from PIL import Image
-            with Image.open(filepath) as img:
-                dimensions = f"{img.width}x{img.height}"
-        except ImportError:
-            pass  # PIL not available
-        except Exception:
-            pass  # Can't read image
+    if unchanged and not (is_image and cached[3] is None and pil_image() is not None):
+        # Only the hash is stale; skip PIL entirely
+        digest = hash_file(filepath, stat.st_size)
+        dimensions = cached[3]
+    elif is_image:
+        if stat.st_size <= IMAGE_READ_LIMIT:
+            # Open the file once: hash the bytes, then let PIL parse the
+            # header from memory (no pixel decode happens)
+            data = filepath.read_bytes()
+            digest = hash_bytes(data)
+            dimensions = image_dimensions(io.BytesIO(data))
+        else:
+            digest = hash_file(filepath, stat.st_size)
+            dimensions = image_dimensions(filepath)
+    else:
+        digest = hash_file(filepath, stat.st_size)
 
     return {
         "size": stat.st_size,
-        "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-        "hash": md5,
+        "modified": modified,
+        "hash": digest,
         "dimensions": dimensions
     }
 
 
-def scan_directory(base_path: Path, category_path: str, patterns: list) -> list:
-    """Scan a directory for matching files."""
-    full_path = base_path / category_path
-
-    if not full_path.exists():
-        return []
-
-    files = []
-    for pattern in patterns:
-        files.extend(full_path.glob(pattern))
-        # Also check subdirectories
-        files.extend(full_path.glob(f"**/{pattern}"))
-
-    # Remove duplicates and sort
-    files = sorted(set(files))
-    return files
-
-
-def generate_manifest(projects: list = None) -> dict:
-    """Generate the full manifest."""
+@functools.lru_cache(maxsize=None)
+def pattern_matcher(patterns: tuple):
+    """Compile glob patterns into a single regex match function (cached)."""
+    return re.compile('|'.join(fnmatch.translate(p) for p in patterns)).match
+
+
+def is_within(rel_path: str, category_path: str) -> bool:
+    """Check whether a normalized relative path lies inside a category path."""
+    return (category_path == '.' or rel_path == category_path
+            or rel_path.startswith(category_path + os.sep))
+
+
+def scan_project(base_path: Path, categories: dict) -> dict:
+    """Scan all categories of a project, returning {cat_key: sorted files}.
+
+    Category directories often nest (e.g. encounters inside a campaign
+    folder), so only the outermost ones are walked, once each; every file
+    is matched against the patterns of all categories that contain it.
+    Categories with "recursive": False only match files directly in their
+    directory, and subtrees no category needs are not descended into.
+    os.walk yields nothing for a missing directory, so no up-front stat.
+    """
+    specs = [(cat_key, os.path.normpath(category["path"]),
+              pattern_matcher(tuple(category["patterns"])),
+              category.get("recursive", True))
+             for cat_key, category in categories.items()]
+    cat_paths = {path for _, path, _, _ in specs}
+    roots = [path for path in cat_paths
+             if not any(other != path and is_within(path, other) for other in cat_paths)]
+
+    def needed(rel_dir):
+        # A directory is walked if a recursive category covers it or a
+        # category lives at or below it
+        return any((recursive and is_within(rel_dir, path)) or is_within(path, rel_dir)
+                   for _, path, _, recursive in specs)
+
+    found = {cat_key: [] for cat_key, _, _, _ in specs}
+    for root in sorted(roots):
+        for dirpath, dirnames, names in os.walk(base_path / root):
+            rel_dir = os.path.relpath(dirpath, base_path)
+            dirnames[:] = [d for d in dirnames if needed(os.path.join(rel_dir, d))]
+            matchers = [(cat_key, matcher) for cat_key, path, matcher, recursive in specs
+                        if rel_dir == path or (recursive and is_within(rel_dir, path))]
+            for name in names:
+                for cat_key, matcher in matchers:
+                    if matcher(name):
+                        found[cat_key].append(Path(dirpath) / name)
+
+    return {cat_key: sorted(files) for cat_key, files in found.items()}
+
+
+def to_columns(assets: list) -> dict:
+    """Convert a list of asset dicts to {field: [values]} (rows missing a field get None)."""
+    fields = dict.fromkeys(key for asset in assets for key in asset)
+    return {field: [asset.get(field) for asset in assets] for field in fields}
+
+
+def from_columns(assets) -> list:
+    """Convert {field: [values]} back to a list of asset dicts, dropping None values.
+
+    Manifests before version 2.0 stored assets as a plain list, which is
+    returned unchanged.
+    """
+    if isinstance(assets, list):
+        return assets
+    fields = list(assets)
+    rows = zip(*(assets[field] for field in fields))
+    return [{f: v for f, v in zip(fields, row) if v is not None} for row in rows]
+
+
+def load_hash_cache(manifest_path: Path) -> dict:
+    """Load {absolutePath: (size, modified, hash, dimensions)} from a previous manifest.
+
+    If the previous manifest used a different hash algorithm, its hashes
+    are dropped (set to None) but image dimensions are kept.
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    # Manifests written before hashAlgorithm was recorded used MD5
+    same_algorithm = previous.get("hashAlgorithm", "md5") == HASH_ALGORITHM
+
+    cache = {}
+    for project_data in previous.get("projects", {}).values():
+        for cat_data in project_data.get("categories", {}).values():
+            for asset in from_columns(cat_data.get("assets", [])):
+                if "absolutePath" in asset and "hash" in asset:
+                    cache[asset["absolutePath"]] = (
+                        asset.get("size"),
+                        asset.get("modified"),
+                        asset["hash"] if same_algorithm else None,
+                        asset.get("dimensions")
+                    )
+    return cache
+
+
+def process_file(filepath: Path, extract_content: bool, cached: tuple = None) -> tuple:
+    """Collect file metadata and narrative items for a single file.
+
+    Runs in a pool worker; returns (filepath, info, narrative_items),
+    where narrative_items is None for files that aren't extracted.
+    """
+    info = get_file_info(filepath, cached)
+    narrative_items = None
+    if extract_content and filepath.suffix in ['.json', '.yaml', '.yml']:
+        narrative_items = extract_narrative_items(filepath)
+    return filepath, info, narrative_items
+
+
+def generate_manifest(projects: list = None, max_workers: int = None, cache: dict = None,
+                      threads: bool = False) -> dict:
+    """Generate the full manifest.
+
+    ``cache`` comes from load_hash_cache(); unchanged files reuse their
+    previous hash and dimensions. With ``threads``, files are processed in
+    a thread pool instead of a process pool, which overlaps I/O stalls more
+    cheaply when reading from a slow or cold disk (hashing releases the GIL).
+    """
 
     if projects is None:
         projects = list(PROJECTS.keys())
+    if cache is None:
+        cache = {}
 
     manifest = {
         "generated": datetime.now().isoformat(),
         "generator": "generate-manifest.py",
-        "version": "1.0",
+        "version": "2.0",
+        "hashAlgorithm": HASH_ALGORITHM,
         "projects": {}
     }
 
-    total_assets = 0
+    # First pass: scan every category so all files can be processed in parallel
+    scanned = []
+    extract_flags = {}
 
     for project_key in projects:
         if project_key not in PROJECTS:
@@ -416,6 +651,39 @@ def generate_manifest(projects: list = None) -> dict:
             print(f"Warning: Project path not found: {base_path}")
             continue
 
+        categories = []
+        project_files = scan_project(base_path, project["categories"])
+        for cat_key, category in project["categories"].items():
+            files = project_files[cat_key]
+
+            if not files:
+                continue
+
+            extract_content = category.get("extractContent", False)
+            for filepath in files:
+                extract_flags[filepath] = extract_flags.get(filepath, False) or extract_content
+            categories.append((cat_key, category, files))
+
+        scanned.append((project_key, project, base_path, categories))
+
+    # Hash files and extract narrative content across a worker pool;
+    # only each file's own cache entry is sent to the workers
+    paths = list(extract_flags)
+    if threads:
+        pool = ThreadPoolExecutor(max_workers=max_workers or min(32, (os.cpu_count() or 1) * 4))
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count())
+    with pool as executor:
+        results = executor.map(process_file,
+                               paths,
+                               [extract_flags[p] for p in paths],
+                               [cache.get(str(p)) for p in paths],
+                               chunksize=32)
+        processed = {filepath: (info, items) for filepath, info, items in results}
+
+    total_assets = 0
+
+    for project_key, project, base_path, categories in scanned:
         project_data = {
             "name": project["name"],
             "basePath": str(base_path),
@@ -423,22 +691,16 @@ def generate_manifest(projects: list = None) -> dict:
             "totalAssets": 0
         }
 
-        for cat_key, category in project["categories"].items():
-            files = scan_directory(base_path, category["path"], category["patterns"])
-
-            if not files:
-                continue
-
+        for cat_key, category, files in categories:
             assets = []
             extract_content = category.get("extractContent", False)
 
             for filepath in files:
                 rel_path = filepath.relative_to(base_path)
-                info = get_file_info(filepath)
+                info, narrative_items = processed[filepath]
 
                 # For content files, extract individual reviewable items
                 if extract_content and filepath.suffix in ['.json', '.yaml', '.yml']:
-                    narrative_items = extract_narrative_items(filepath)
                     if narrative_items:
                         for item in narrative_items:
                             assets.append({
@@ -479,7 +741,7 @@ def generate_manifest(projects: list = None) -> dict:
                     "path": category["path"],
                     "reviewType": category["reviewType"],
                     "extractContent": extract_content,
-                    "assets": assets,
+                    "assets": to_columns(assets),
                     "count": len(assets)
                 }
                 project_data["totalAssets"] += len(assets)
@@ -501,6 +763,16 @@ def main():
     parser.add_argument("--output", "-o",
                         default="manifest.json",
                         help="Output file (default: manifest.json)")
+    parser.add_argument("--jobs", "-j",
+                        type=int,
+                        default=None,
+                        help="Workers for hashing (default: CPU count, or 4x that with --threads)")
+    parser.add_argument("--threads",
+                        action="store_true",
+                        help="Use worker threads instead of processes (for network or cold disks)")
+    parser.add_argument("--no-cache",
+                        action="store_true",
+                        help="Re-hash every file instead of reusing unchanged entries from the previous manifest")
 
     args = parser.parse_args()
 
@@ -511,12 +783,17 @@ def main():
     print("=" * 60)
     print()
 
-    manifest = generate_manifest(projects)
+    output_path = Path(__file__).parent / args.output
+    cache = {} if args.no_cache else load_hash_cache(output_path)
+
+    manifest = generate_manifest(projects, max_workers=args.jobs, cache=cache, threads=args.threads)
 
     # Write manifest
-    output_path = Path(__file__).parent / args.output
-    with open(output_path, 'w') as f:
-        json.dump(manifest, f, indent=2)
+    if orjson is not None:
+        output_path.write_bytes(orjson.dumps(manifest, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(output_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
 
     print(f"Generated: {manifest['generated']}")
     print()
@@ -5,9 +5,15 @@ QA Portal Server
 Serves the QA Portal and proxies asset requests to project directories.
 """
 
+import collections
+import functools
 import http.server
-import socketserver
+import io
 import os
+import posixpath
+import stat
+import threading
+import time
 from pathlib import Path
 from urllib.parse import unquote
 
@@ -20,45 +26,226 @@ PROJECT_ROOTS = {
     '/HashChampions/': Path('/Users/petermckernan/Projects/HashChampions'),
 }
 
+# First URL path segment -> [(url_prefix, prefix_length, fs_root + '/')],
+# built once so translate_path does one dict lookup regardless of how many
+# projects are configured, then only string slicing and concatenation
+def _build_roots(project_roots):
+    roots = {}
+    for prefix, root in project_roots.items():
+        roots.setdefault(prefix[1:].partition('/')[0], []).append(
+            (prefix, len(prefix), str(root) + '/'))
+    return roots
+
+
+_ROOTS = _build_roots(PROJECT_ROOTS)
+
+# Headers added to every response, encoded once
+_EXTRA_HEADERS = (
+    b"Access-Control-Allow-Origin: *\r\n"
+    b"Access-Control-Allow-Methods: GET, OPTIONS\r\n"
+    b"Cache-Control: no-cache\r\n"
+)
+
+# Small files are kept in memory between requests, keyed by filesystem path
+FILE_CACHE_ENTRIES = 128
+FILE_CACHE_MAX_SIZE = 1 << 20
+_file_cache = collections.OrderedDict()  # path -> ((mtime_ns, size), etag, body)
+_file_cache_lock = threading.Lock()
+
+# Stats of cacheable files are reused for a short time, so asset bursts
+# skip the stat call
+STAT_CACHE_TTL = 2.0
+STAT_CACHE_ENTRIES = 1024
+_stat_cache = collections.OrderedDict()  # path -> (monotonic timestamp, stat_result)
+_stat_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=2048)
+def _translate(path):
+    """Translate URL path to filesystem path, checking project roots.
+
+    Cached by raw URL path: the portal re-requests the same few assets.
+    """
+    # Most asset URLs have no escapes; skip decoding for those
+    if '%' in path:
+        path = unquote(path)
+
+    # Check if path matches any project root
+    for url_prefix, prefix_len, fs_root in _ROOTS.get(path[1:].partition('/')[0], ()):
+        if path.startswith(url_prefix):
+            # Map to the project directory
+            return fs_root + path[prefix_len:]
+
+    # Default: serve from review directory (same rules as
+    # SimpleHTTPRequestHandler.translate_path)
+    path = path.split('?', 1)[0]
+    path = path.split('#', 1)[0]
+    trailing_slash = path.rstrip().endswith('/')
+    result = str(REVIEW_DIR)
+    for word in posixpath.normpath(path).split('/'):
+        if not word or os.path.dirname(word) or word in (os.curdir, os.pardir):
+            continue
+        result = os.path.join(result, word)
+    if trailing_slash:
+        result += '/'
+    return result
+
+
+def _stat_cached(fs_path):
+    """os.stat() with results reused for STAT_CACHE_TTL seconds.
+
+    Only small regular files (the ones _cached_file serves) are kept;
+    directories and large files are stat'ed again by send_head's fallback.
+    """
+    now = time.monotonic()
+    with _stat_cache_lock:
+        entry = _stat_cache.get(fs_path)
+        if entry:
+            if now - entry[0] < STAT_CACHE_TTL:
+                _stat_cache.move_to_end(fs_path)
+                return entry[1]
+            del _stat_cache[fs_path]
+
+    st = os.stat(fs_path)
+    if stat.S_ISREG(st.st_mode) and 0 < st.st_size <= FILE_CACHE_MAX_SIZE:
+        with _stat_cache_lock:
+            _stat_cache[fs_path] = (now, st)
+            _stat_cache.move_to_end(fs_path)
+            while len(_stat_cache) > STAT_CACHE_ENTRIES:
+                _stat_cache.popitem(last=False)
+    return st
+
+
+def _cached_file(fs_path, st):
+    """Return (etag, body) for a small file, re-reading it only when it changed."""
+    key = (st.st_mtime_ns, st.st_size)
+    with _file_cache_lock:
+        entry = _file_cache.get(fs_path)
+        if entry and entry[0] == key:
+            _file_cache.move_to_end(fs_path)
+            return entry[1], entry[2]
+
+    with open(fs_path, 'rb') as f:
+        body = f.read()
+    etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    # Don't cache a file that changed between the stat and the read
+    if len(body) == st.st_size:
+        with _file_cache_lock:
+            _file_cache[fs_path] = (key, etag, body)
+            _file_cache.move_to_end(fs_path)
+            while len(_file_cache) > FILE_CACHE_ENTRIES:
+                _file_cache.popitem(last=False)
+    return etag, body
+
+
 class QAPortalHandler(http.server.SimpleHTTPRequestHandler):
+    # Keep connections open across the portal's many asset requests;
+    # every response SimpleHTTPRequestHandler sends carries Content-Length
+    protocol_version = "HTTP/1.1"
+    # Don't let Nagle hold back small header/304 writes on kept-alive sockets
+    disable_nagle_algorithm = True
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(REVIEW_DIR), **kwargs)
 
     def translate_path(self, path):
-        """Translate URL path to filesystem path, checking project roots."""
-        path = unquote(path)
+        return _translate(path)
+
+    def send_head(self):
+        """Serve small files from the in-memory cache, with ETag revalidation."""
+        path = self.translate_path(self.path)
+        if path.endswith('/'):
+            # Directory URLs (notably "/") serve their index page when present
+            for index in ("index.html", "index.htm"):
+                if os.path.isfile(path + index):
+                    path += index
+                    break
+            else:
+                return super().send_head()
+        try:
+            st = _stat_cached(path)
+        except OSError:
+            return super().send_head()
+        if not stat.S_ISREG(st.st_mode) or not 0 < st.st_size <= FILE_CACHE_MAX_SIZE:
+            return super().send_head()
+        if "If-None-Match" not in self.headers and "If-Modified-Since" in self.headers:
+            return super().send_head()
 
-        # Check if path matches any project root
-        for url_prefix, fs_root in PROJECT_ROOTS.items():
-            if path.startswith(url_prefix):
-                # Map to the project directory
-                relative_path = path[len(url_prefix):]
-                full_path = fs_root / relative_path
-                return str(full_path)
+        try:
+            etag, body = _cached_file(path, st)
+        except OSError:
+            return super().send_head()
+
+        if etag in self.headers.get("If-None-Match", "").split(", "):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
 
-        # Default: serve from review directory
-        return super().translate_path(path)
+        self.send_response(200)
+        self.send_header("Content-type", self.guess_type(path))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", self.date_time_string(st.st_mtime))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def copyfile(self, source, outputfile):
+        """Send file bodies with sendfile(2) instead of copying through Python."""
+        if outputfile is not self.wfile:
+            return super().copyfile(source, outputfile)
+        if isinstance(source, io.BytesIO):
+            # In-memory bodies (cached files, directory listings) go out in one write
+            outputfile.write(source.getvalue())
+            return
+        # Headers must reach the socket before the file payload
+        outputfile.flush()
+        self.connection.sendfile(source)
 
     def end_headers(self):
-        # Add CORS headers for local development
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
-        self.send_header('Cache-Control', 'no-cache')
+        # Add CORS headers for local development (pre-encoded, bypassing send_header)
+        if self.request_version != 'HTTP/0.9':
+            self._headers_buffer.append(_EXTRA_HEADERS)
         super().end_headers()
 
-    def log_message(self, format, *args):
-        # Cleaner logging
-        path = args[0].split()[1] if args else ''
-        status = args[1] if len(args) > 1 else ''
-        if status == '200':
+    def flush_headers(self):
+        # The handler lives for the whole kept-alive connection; reuse its
+        # header list rather than allocating a new one per response
+        if hasattr(self, '_headers_buffer'):
+            self.wfile.write(b"".join(self._headers_buffer))
+            self._headers_buffer.clear()
+
+    def log_request(self, code='-', size='-'):
+        # Cleaner logging, decided before any message formatting happens
+        code = getattr(code, 'value', code)
+        if code == 200:
             return  # Don't log successful requests
-        print(f"  {status} {path}")
+        print(f"  {code} {getattr(self, 'path', '')}")
+
+    def log_error(self, format, *args):
+        # send_error's "code %d, message %s" repeats what log_request prints
+        if not format.startswith("code %d"):
+            super().log_error(format, *args)
+
+
+class QAPortalServer(http.server.ThreadingHTTPServer):
+    """Threaded server so one slow asset doesn't stall the rest of the page."""
+    daemon_threads = True
+    allow_reuse_address = True
 
 
 def main():
     os.chdir(REVIEW_DIR)
 
-    with socketserver.TCPServer(("", PORT), QAPortalHandler) as httpd:
+    # Load the portal page up front so the first visit is served from memory
+    index_path = str(REVIEW_DIR / "index.html")
+    try:
+        _cached_file(index_path, os.stat(index_path))
+    except OSError:
+        pass
+
+    with QAPortalServer(("", PORT), QAPortalHandler) as httpd:
         print("=" * 60)
         print("   QA PORTAL SERVER")
         print("=" * 60)
@@ -68,7 +255,7 @@ def main():
         print("   Serving:")
         print(f"     • Review Portal: {REVIEW_DIR}")
         for url, path in PROJECT_ROOTS.items():
-            exists = "✓" if path.exists() else "✗"
+            exists = "✓" if os.path.isdir(path) else "✗"
             print(f"     {exists} {url} → {path}")
         print()
         print("   Press Ctrl+C to stop")